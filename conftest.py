@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+pytest fixtures shared by the MCP Shell Server test scripts
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from mcp_test_client import MCPClient, ServerPool, debug_ring
+
+_HERE = Path(__file__).resolve().parent
+SERVER_PATH = str(_HERE / "safe_shell_mcp.py")
+SAFE_ROOT = str(_HERE.parent)
+
+def start_mcp_server(on_stderr=None):
+    """Launch one MCP server and complete the initialize handshake"""
+    client = MCPClient(SERVER_PATH, SAFE_ROOT, on_stderr=on_stderr)
+    client.initialize()
+    return client
+
+@pytest.fixture(scope="session")
+def mcp_server():
+    """One initialized server shared by every test in the session; its debug output
+    is buffered in debug_ring and only shown for failing tests"""
+    client = start_mcp_server(on_stderr=debug_ring.append)
+    yield client
+    client.close()
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Attach the server debug lines buffered during a failing test to its report"""
+    outcome = yield
+    report = outcome.get_result()
+    if report.when == "call":
+        if report.failed and debug_ring:
+            report.sections.append(("server debug", "\n".join(debug_ring)))
+        debug_ring.clear()
+
+@pytest.fixture(scope="session")
+def mcp_pool():
+    """Warm servers for tests that need several at once or may leave one stuck on a
+    hung command (MCP_TEST_POOL_SIZE, default 3)"""
+    size = int(os.environ.get("MCP_TEST_POOL_SIZE", "3"))
+    with ServerPool(SERVER_PATH, SAFE_ROOT, size, on_stderr=debug_ring.append) as pool:
+        yield pool
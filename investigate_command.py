@@ -10,6 +10,8 @@ import time
 import threading
 from pathlib import Path
 
+from mcp_test_client import debug_ring, dump_debug, dumps, loads
+
 def investigate_command_behavior():
     """Investigate the exact command execution behavior"""
     print("🔍 Detailed Command Execution Investigation")
@@ -44,27 +46,23 @@ def investigate_command_behavior():
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1
+            bufsize=65536
         )
         
-        debug_output = []
-        
         def read_stderr():
-            """Capture all debug output"""
+            """Capture all debug output (the most recent lines) for dump_debug()"""
             while True:
                 line = server_proc.stderr.readline()
                 if not line:
                     break
-                debug_output.append(line.strip())
-                print(f"🔧 {line.strip()}")
+                debug_ring.append(line.decode(errors="replace").rstrip())
         
         stderr_thread = threading.Thread(target=read_stderr, daemon=True)
         stderr_thread.start()
         
         # Initialize
         init_msg = {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}}
-        server_proc.stdin.write(json.dumps(init_msg) + "\n")
+        server_proc.stdin.write(dumps(init_msg) + b"\n")
         server_proc.stdin.flush()
         
         # Wait for init response
@@ -92,7 +90,7 @@ def investigate_command_behavior():
             }
         }
         
-        server_proc.stdin.write(json.dumps(cmd_msg) + "\n")
+        server_proc.stdin.write(dumps(cmd_msg) + b"\n")
         server_proc.stdin.flush()
         print(f"📤 Command sent at {time.time() - start_time:.3f}s")
         
@@ -111,7 +109,7 @@ def investigate_command_behavior():
                         elapsed = time.time() - start_time
                         print(f"📥 Response received at {elapsed:.3f}s")
                         try:
-                            resp_data = json.loads(response)
+                            resp_data = loads(response)
                             if "result" in resp_data:
                                 content = resp_data["result"]["content"][0]["text"]
                                 print(f"✅ Command result: '{content}' (length: {len(content)})")
@@ -122,7 +120,7 @@ def investigate_command_behavior():
                                 print(f"❓ Unexpected response structure: {resp_data}")
                         except json.JSONDecodeError as e:
                             print(f"❌ JSON decode error: {e}")
-                            print(f"Raw response: '{response}'")
+                            print(f"Raw response: '{response.decode(errors='replace')}'")
                             break
                 else:
                     elapsed = time.time() - start_time
@@ -135,7 +133,7 @@ def investigate_command_behavior():
                 response = server_proc.stdout.readline()
                 if response:
                     elapsed = time.time() - start_time
-                    print(f"📥 Response received at {elapsed:.3f}s: {response}")
+                    print(f"📥 Response received at {elapsed:.3f}s: {response.decode(errors='replace')}")
                     response_received = True
                     break
                 time.sleep(0.1)
@@ -143,9 +141,8 @@ def investigate_command_behavior():
         if not response_received:
             elapsed = time.time() - start_time
             print(f"❌ NO RESPONSE received after {elapsed:.1f}s!")
-            print("🔍 Debug output summary:")
-            for line in debug_output[-10:]:  # Show last 10 debug lines
-                print(f"   {line}")
+            print("🔍 Debug output:")
+            dump_debug()
         
         # Check if process is still running
         if server_proc.poll() is None:
@@ -156,14 +153,14 @@ def investigate_command_behavior():
         # Try to shutdown gracefully
         try:
             shutdown_msg = {"jsonrpc": "2.0", "id": 99, "method": "shutdown"}
-            server_proc.stdin.write(json.dumps(shutdown_msg) + "\n")
+            server_proc.stdin.write(dumps(shutdown_msg) + b"\n")
             server_proc.stdin.flush()
             
             # Wait a bit for shutdown
             time.sleep(1)
             if server_proc.poll() is None:
                 exit_msg = {"jsonrpc": "2.0", "method": "exit"}
-                server_proc.stdin.write(json.dumps(exit_msg) + "\n")
+                server_proc.stdin.write(dumps(exit_msg) + b"\n")
                 server_proc.stdin.flush()
                 server_proc.wait(timeout=3)
         except:
@@ -174,6 +171,7 @@ def investigate_command_behavior():
         print(f"❌ Investigation failed: {e}")
         import traceback
         traceback.print_exc()
+        dump_debug()
         
     print("\n✅ Investigation completed!")
 
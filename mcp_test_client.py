@@ -0,0 +1,694 @@
+#!/usr/bin/env python3
+"""
+Shared JSON-RPC client used by the MCP Shell Server test scripts
+Owns one server process and matches responses to requests by id
+"""
+
+import asyncio
+import json
+import os
+import queue
+import re
+import selectors
+import signal
+import subprocess
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+# Launch servers with the interpreter running the tests rather than whatever `python3` is on PATH
+PYTHON = sys.executable
+
+# Server debug logging is opt-in (MCP_TEST_DEBUG=1); otherwise stderr is not captured at all
+DEBUG = os.environ.get("MCP_TEST_DEBUG") == "1"
+
+# Recent server debug lines (pass on_stderr=debug_ring.append), shown only when
+# something fails; echoing every line of a --debug server makes terminal I/O the bottleneck
+debug_ring = deque(maxlen=1024)
+
+def dump_debug():
+    """Write the buffered server debug lines to stderr and clear the buffer"""
+    if debug_ring:
+        sys.stderr.write("".join(f"🔧 {line}\n" for line in debug_ring))
+        debug_ring.clear()
+
+try:
+    import orjson  # Optional: faster and encodes straight to bytes
+except ImportError:
+    orjson = None
+
+def dumps(msg):
+    """Serialize a JSON-RPC message (or batch) to compact UTF-8 bytes"""
+    if orjson is not None:
+        return orjson.dumps(msg)
+    return json.dumps(msg, separators=(",", ":")).encode()
+
+def loads(data):
+    """Parse one JSON document from bytes; orjson's error type subclasses json.JSONDecodeError"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# The initialize request is identical for every one-shot server, so encode it once
+INIT_FRAME = dumps({"jsonrpc": "2.0", "id": 0, "method": "initialize", "params": {}})
+# Fixed-shape close frames, encoded once; only the shutdown id varies
+SHUTDOWN_TEMPLATE = b'{"jsonrpc":"2.0","id":%d,"method":"shutdown"}\n'
+EXIT_FRAME = b'{"jsonrpc":"2.0","method":"exit"}\n'
+
+# tools/call requests only differ in tool name, arguments and id, so the part up to
+# the arguments is encoded once per tool and a call only serializes its arguments
+_TOOL_PREFIX = {}
+_TOOL_SUFFIX = b'},"id":%d}'
+
+def tool_frame(tool_name, arguments, rid):
+    """Encoded tools/call request (without the trailing newline)"""
+    prefix = _TOOL_PREFIX.get(tool_name)
+    if prefix is None:
+        prefix = _TOOL_PREFIX[tool_name] = (
+            b'{"jsonrpc":"2.0","method":"tools/call","params":{"name":'
+            + dumps(tool_name) + b',"arguments":'
+        )
+    return prefix + dumps(arguments or {}) + _TOOL_SUFFIX % rid
+
+def tool_batch(tool_name, arguments=None, rid=1):
+    """Stdin payload for a one-shot server: initialize + tools/call as one JSON-RPC batch"""
+    return b"[" + INIT_FRAME + b"," + tool_frame(tool_name, arguments, rid) + b"]\n"
+
+def spawn(argv, **kwargs):
+    """Popen the server in its own session so it and any shells it started can be
+    killed as one process group. start_new_session is used instead of
+    preexec_fn=os.setsid because servers are also spawned from worker threads.
+    Pipes are block-buffered; callers flush() after each frame they write.
+    close_fds defaults to False: Python's own fds are non-inheritable (PEP 446),
+    so closing them in the child is wasted work on every launch."""
+    kwargs.setdefault("start_new_session", True)
+    kwargs.setdefault("bufsize", 65536)
+    kwargs.setdefault("close_fds", False)
+    return subprocess.Popen(argv, **kwargs)
+
+def kill_tree(proc, timeout=2):
+    """SIGKILL the process group of a spawn()ed process and reap it"""
+    if proc.poll() is None:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    try:
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        pass
+
+def call_once(proc, payload, timeout, rid=None):
+    """Feed a one-shot server its whole stdin and collect stdout until it exits.
+    Does what communicate(payload, timeout) does with one write and a select/os.read
+    loop; the payload must fit in the pipe buffer, as a tool_batch() does. Like
+    communicate(), a server that already exited just yields its output so far. Raises
+    subprocess.TimeoutExpired at the deadline - reaping the server is up to the caller.
+    With rid, returns as soon as the response to that request has arrived instead of
+    waiting for the server to shut down; the server may then still be running.
+    stdout is closed on return either way, so nothing is left for the caller to close."""
+    try:
+        proc.stdin.write(payload)
+        proc.stdin.close()
+    except BrokenPipeError:
+        pass  # The server is gone; what it wrote before exiting is still read below
+    fd = proc.stdout.fileno()
+    buf = bytearray()
+    scanned = 0  # Complete lines before this offset have been checked for rid
+    deadline = time.monotonic() + timeout
+    with selectors.DefaultSelector() as sel, proc.stdout:
+        sel.register(fd, selectors.EVENT_READ)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not sel.select(remaining):
+                raise subprocess.TimeoutExpired(proc.args, timeout, output=bytes(buf))
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                break
+            buf += chunk
+            if rid is not None:
+                end = buf.rfind(b"\n") + 1
+                if end > scanned:
+                    if find_response(bytes(buf[scanned:end]), rid) is not None:
+                        return bytes(buf)
+                    scanned = end
+    proc.wait(max(deadline - time.monotonic(), 0))
+    return bytes(buf)
+
+# Worst-case-reasonable response times by command type, so a regression fails in
+# seconds instead of minutes. curl gets the server's own NETWORK_COMMAND_TIMEOUT (45s)
+# plus slack, since a hung fetch is only cut off by the server.
+TIMEOUTS = {"chmod": 2.0, "curl": 50.0, "loop": 10.0}
+
+def timeout_for(command):
+    """Response timeout for a shell command, keyed on its first word"""
+    return TIMEOUTS.get(command.split(None, 1)[0], TIMEOUTS["loop"])
+
+def proc_diagnostics(pid):
+    """Post-mortem lines for a stuck process and its descendants: state, wchan and
+    kernel stack from /proc (the stack is usually only readable as root)"""
+    lines = []
+    pending = [pid]
+    while pending:
+        pid = pending.pop()
+        proc_dir = f"/proc/{pid}"
+        try:
+            with open(f"{proc_dir}/stat") as f:
+                # comm can contain spaces, so split after its closing paren
+                state = f.read().rpartition(")")[2].split()[0]
+            with open(f"{proc_dir}/cmdline", "rb") as f:
+                cmdline = f.read().replace(b"\0", b" ").decode(errors="replace").strip()
+        except OSError:
+            continue
+        lines.append(f"pid {pid} [{state}] {cmdline}")
+        for name in ("wchan", "stack"):
+            try:
+                with open(f"{proc_dir}/{name}") as f:
+                    text = f.read().strip()
+            except OSError as e:
+                text = f"<{e.strerror}>"
+            if text:
+                lines.extend(f"  {name}: {entry}" for entry in text.splitlines())
+        try:
+            with open(f"{proc_dir}/task/{pid}/children") as f:
+                pending.extend(int(child) for child in f.read().split())
+        except OSError:
+            pass
+    return lines
+
+def _server_argv(server_path, safe_root, debug):
+    # -S/-I: the server is stdlib-only, so skip site.py and user paths to cut startup time
+    argv = [PYTHON, "-S", "-I", str(server_path), "--saferoot", str(safe_root)]
+    if debug:
+        argv.append("--debug")
+    return argv
+
+# The server writes every frame compactly with "jsonrpc" first, so a response's id
+# or a progress notification can be recognised from the first bytes of the line
+_ID_HEAD = re.compile(rb'\{"jsonrpc":"2\.0","id":(\d+),')
+_PROGRESS_HEAD = b'{"jsonrpc":"2.0","method":"$/progress"'
+
+def find_response(buf, rid):
+    """The response to request `rid` in captured server output (bytes), or None.
+    One pass with an early exit; progress notifications and responses to other
+    ids are recognised by their first bytes and never parsed."""
+    for line in buf.splitlines():
+        if not line or line.startswith(_PROGRESS_HEAD):
+            continue
+        head = _ID_HEAD.match(line)
+        if head and int(head[1]) != rid:
+            continue
+        try:
+            msg = loads(line)
+        except json.JSONDecodeError:
+            continue
+        for member in msg if isinstance(msg, list) else (msg,):
+            if isinstance(member, dict) and member.get("id") == rid:
+                return member
+    return None
+
+class MCPClient:
+    def __init__(self, server_path, safe_root, debug=None, on_stderr=None):
+        if debug is None:
+            debug = DEBUG
+        self.proc = spawn(
+            _server_argv(server_path, safe_root, debug),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE if debug else subprocess.DEVNULL
+        )
+        self.stderr_lines = []
+        self._on_stderr = on_stderr
+        self._next_id = 1
+        self._pending = {}  # Responses that arrived while waiting for another id (maybe still raw bytes)
+        self._inbox = deque()  # Unread members of a batch reply
+        self._buf = bytearray()
+        self._err_buf = bytearray()
+        self._stdout_open = True
+        self._stderr_open = debug
+
+        # Debug output is drained by the same selector wait as responses, so
+        # the stderr pipe never fills up and no reader thread is needed
+        self._sel = selectors.DefaultSelector()
+        os.set_blocking(self.proc.stdout.fileno(), False)
+        self._sel.register(self.proc.stdout, selectors.EVENT_READ, "out")
+        if debug:
+            os.set_blocking(self.proc.stderr.fileno(), False)
+            self._sel.register(self.proc.stderr, selectors.EVENT_READ, "err")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _pump_stderr(self):
+        """Read the debug output that is ready and split it into stderr_lines"""
+        try:
+            chunk = os.read(self.proc.stderr.fileno(), 65536)
+        except BlockingIOError:
+            return
+        if not chunk:
+            # EOF - flush a trailing partial line and stop watching the pipe
+            self._sel.unregister(self.proc.stderr)
+            self._stderr_open = False
+            if self._err_buf:
+                chunk = b"\n"
+        self._absorb_stderr(chunk)
+
+    def _pump_stdout(self):
+        """Read everything stdout has ready, so a burst of progress frames costs
+        one select wake-up instead of one per frame"""
+        fd = self.proc.stdout.fileno()
+        while True:
+            try:
+                chunk = os.read(fd, 65536)
+            except BlockingIOError:
+                return
+            if not chunk:
+                # Server closed stdout
+                self._sel.unregister(self.proc.stdout)
+                self._stdout_open = False
+                return
+            self._buf += chunk
+            if len(chunk) < 65536:
+                return  # Short read: the pipe is drained, skip the EAGAIN round-trip
+
+    def _absorb_stderr(self, chunk):
+        self._err_buf += chunk
+        while True:
+            i = self._err_buf.find(b"\n")
+            if i < 0:
+                break
+            line = self._err_buf[:i].decode("utf-8", errors="replace").rstrip()
+            del self._err_buf[:i + 1]
+            self.stderr_lines.append(line)
+            if self._on_stderr:
+                self._on_stderr(line)
+
+    def _pump(self, timeout):
+        """Wait up to `timeout` for either pipe and absorb whatever is ready; False on timeout"""
+        events = self._sel.select(timeout)
+        for key, _ in events:
+            if key.data == "err":
+                self._pump_stderr()
+            else:
+                self._pump_stdout()
+        return bool(events)
+
+    def _drain_stderr(self, timeout=1):
+        """Collect the debug output still buffered after the server exited"""
+        deadline = time.monotonic() + timeout
+        while self._stderr_open and (remaining := deadline - time.monotonic()) > 0:
+            self._pump(remaining)
+
+    def wait(self, seconds):
+        """Sleep for `seconds` while still draining server output (stdout and debug stderr)"""
+        deadline = time.monotonic() + seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            if not (self._stdout_open or self._stderr_open):
+                time.sleep(remaining)
+                return
+            self._pump(remaining)
+
+    def send(self, msg):
+        """Write one JSON-RPC message (or a list of them as a batch) to the server"""
+        self.proc.stdin.write(dumps(msg) + b"\n")
+        self.proc.stdin.flush()
+
+    def request(self, method, params=None):
+        """Send a request with the next free id and return that id"""
+        rid = self._next_id
+        self._next_id += 1
+        msg = {"jsonrpc": "2.0", "id": rid, "method": method}
+        if params is not None:
+            msg["params"] = params
+        self.send(msg)
+        return rid
+
+    def _build_requests(self, calls):
+        msgs = []
+        for method, params in calls:
+            msg = {"jsonrpc": "2.0", "id": self._next_id, "method": method}
+            if params is not None:
+                msg["params"] = params
+            msgs.append(msg)
+            self._next_id += 1
+        return msgs
+
+    def request_batch(self, calls):
+        """Send (method, params) pairs as one JSON-RPC batch and return their ids"""
+        batch = self._build_requests(calls)
+        self.send(batch)
+        return [msg["id"] for msg in batch]
+
+    def request_many(self, calls):
+        """Pipeline (method, params) pairs as separate frames in a single write and
+        return their ids - unlike a batch, each response arrives as soon as it is ready"""
+        msgs = self._build_requests(calls)
+        self.proc.stdin.write(b"".join(dumps(msg) + b"\n" for msg in msgs))
+        self.proc.stdin.flush()
+        return [msg["id"] for msg in msgs]
+
+    def _read_message(self, deadline, waiting=None, progress=True):
+        """Return the next message from stdout, or None on timeout/EOF.
+        Frames nobody is waiting for are not parsed: responses to ids outside
+        `waiting` are parked raw in _pending, and progress notifications are
+        dropped unless `progress` is set."""
+        while True:
+            if self._inbox:
+                return self._inbox.popleft()
+
+            i = self._buf.find(b"\n")
+            if i >= 0:
+                line = bytes(self._buf[:i])
+                del self._buf[:i + 1]
+                if not line.strip():
+                    continue
+                if not progress and line.startswith(_PROGRESS_HEAD):
+                    continue
+                if waiting is not None:
+                    head = _ID_HEAD.match(line)
+                    if head and int(head[1]) not in waiting:
+                        self._pending[int(head[1])] = line
+                        continue
+                try:
+                    msg = loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(msg, list):
+                    # Batch reply - hand its members out one at a time
+                    self._inbox.extend(m for m in msg if isinstance(m, dict))
+                    continue
+                return msg
+
+            if not self._stdout_open:
+                return None  # Server closed stdout
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            if not self._pump(remaining):
+                return None
+
+    def recv(self, rid, timeout=30, on_progress=None):
+        """Wait for the response to request `rid`; returns None on timeout"""
+        return self.recv_all([rid], timeout, on_progress).get(rid)
+
+    def recv_all(self, rids, timeout=30, on_progress=None):
+        """Wait for the responses to several requests in whatever order they arrive.
+        Returns {id: response}; ids still missing at the deadline are left out."""
+        responses = {}
+        for rid in rids:
+            if rid in self._pending:
+                msg = self._pending.pop(rid)
+                responses[rid] = loads(msg) if isinstance(msg, bytes) else msg
+        waiting = set(rids) - responses.keys()
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while waiting:
+            msg = self._read_message(deadline, waiting, progress=on_progress is not None)
+            if msg is None:
+                break
+            if msg.get("method") == "$/progress":
+                if on_progress:
+                    on_progress(msg.get("params", {}))
+            elif msg.get("id") in waiting:
+                responses[msg["id"]] = msg
+                waiting.discard(msg["id"])
+            else:
+                self._pending[msg.get("id")] = msg
+        return responses
+
+    def initialize(self, params=None, timeout=10):
+        return self.recv(self.request("initialize", params or {}), timeout)
+
+    def call(self, name, arguments=None, timeout=30, on_progress=None):
+        """Run a tools/call request and return the full response message"""
+        rid = self._next_id
+        self._next_id += 1
+        self.proc.stdin.write(tool_frame(name, arguments, rid) + b"\n")
+        self.proc.stdin.flush()
+        return self.recv(rid, timeout, on_progress)
+
+    def close(self, graceful=True, timeout=5):
+        """Shut the server down (shutdown/exit when graceful) and reap the process"""
+        if graceful and self.proc.poll() is None:
+            # shutdown and exit go out in one write; communicate() then collects
+            # both pipes until the server exits, so neither can fill up meanwhile
+            frames = SHUTDOWN_TEMPLATE % self._next_id + EXIT_FRAME
+            self._next_id += 1
+            try:
+                out, err = self.proc.communicate(frames, timeout=timeout)
+                self._buf += out or b""
+                if err:
+                    self._absorb_stderr(err if err.endswith(b"\n") else err + b"\n")
+                self._stdout_open = self._stderr_open = False
+            except (OSError, ValueError, subprocess.TimeoutExpired):
+                pass
+
+        # A server that is still running goes down together with its process group
+        kill_tree(self.proc, timeout)
+        self._drain_stderr()
+        self._sel.close()
+        # communicate() closes the pipes itself, but not when it was skipped or timed out
+        for pipe in (self.proc.stdin, self.proc.stdout, self.proc.stderr):
+            if pipe and not pipe.closed:
+                try:
+                    pipe.close()
+                except OSError:
+                    pass  # stdin may still hold a frame the dead server never read
+
+class AsyncMCPClient:
+    """asyncio counterpart of MCPClient: stdout is read with wait_for(readline())
+    and stderr is drained by a task, so waits can be cancelled cleanly"""
+    def __init__(self, server_path, safe_root, debug=None, on_stderr=None):
+        self.server_path = server_path
+        self.safe_root = safe_root
+        self.debug = DEBUG if debug is None else debug
+        self.stderr_lines = []
+        self.proc = None
+        self._on_stderr = on_stderr
+        self._next_id = 1
+        self._pending = {}  # Responses that arrived while waiting for another id
+        self._stderr_task = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self):
+        """Launch the server in its own session (see spawn)"""
+        self.proc = await asyncio.create_subprocess_exec(
+            *_server_argv(self.server_path, self.safe_root, self.debug),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE if self.debug else asyncio.subprocess.DEVNULL,
+            start_new_session=True, close_fds=False,
+            limit=1 << 20  # Long streamed results arrive as a single line
+        )
+        if self.debug:
+            self._stderr_task = asyncio.create_task(self._read_stderr())
+
+    async def _read_stderr(self):
+        while True:
+            raw = await self.proc.stderr.readline()
+            if not raw:
+                return
+            line = raw.decode("utf-8", errors="replace").rstrip()
+            self.stderr_lines.append(line)
+            if self._on_stderr:
+                self._on_stderr(line)
+
+    async def send(self, msg):
+        """Write one JSON-RPC message (or batch) to the server"""
+        self.proc.stdin.write(dumps(msg) + b"\n")
+        await self.proc.stdin.drain()
+
+    async def request(self, method, params=None):
+        """Send a request with the next free id and return that id"""
+        rid = self._next_id
+        self._next_id += 1
+        msg = {"jsonrpc": "2.0", "id": rid, "method": method}
+        if params is not None:
+            msg["params"] = params
+        await self.send(msg)
+        return rid
+
+    async def request_frame(self, template):
+        """Send a pre-serialized request - bytes with a single %d for the id - and return the id"""
+        rid = self._next_id
+        self._next_id += 1
+        self.proc.stdin.write(template % rid)
+        await self.proc.stdin.drain()
+        return rid
+
+    async def recv(self, rid, timeout=30, on_progress=None):
+        """Wait for the response to request `rid`; returns None on timeout/EOF"""
+        if rid in self._pending:
+            return self._pending.pop(rid)
+
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                return None
+            try:
+                raw = await asyncio.wait_for(self.proc.stdout.readline(), remaining)
+            except asyncio.TimeoutError:
+                return None
+            if not raw:
+                return None  # Server closed stdout
+            try:
+                msg = loads(raw)
+            except json.JSONDecodeError:
+                continue
+
+            response = None
+            for m in (msg if isinstance(msg, list) else [msg]):
+                if m.get("method") == "$/progress":
+                    if on_progress:
+                        on_progress(m.get("params", {}))
+                elif m.get("id") == rid:
+                    response = m
+                else:
+                    self._pending[m.get("id")] = m
+            if response:
+                return response
+
+    async def initialize(self, params=None, timeout=10):
+        return await self.recv(await self.request("initialize", params or {}), timeout)
+
+    async def call(self, name, arguments=None, timeout=30, on_progress=None):
+        """Run a tools/call request and return the full response message"""
+        rid = self._next_id
+        self._next_id += 1
+        self.proc.stdin.write(tool_frame(name, arguments, rid) + b"\n")
+        await self.proc.stdin.drain()
+        return await self.recv(rid, timeout, on_progress)
+
+    async def close(self, graceful=True, timeout=5):
+        """Shut the server down (shutdown/exit when graceful) and reap its process group"""
+        if self.proc is None:
+            return
+        if graceful and self.proc.returncode is None:
+            try:
+                await self.recv(await self.request_frame(SHUTDOWN_TEMPLATE), timeout)
+                self.proc.stdin.write(EXIT_FRAME)
+                await self.proc.stdin.drain()
+                await asyncio.wait_for(self.proc.wait(), timeout)
+            except (OSError, asyncio.TimeoutError):
+                pass
+
+        if self.proc.returncode is None:
+            try:
+                os.killpg(self.proc.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+            await self.proc.wait()
+        if self._stderr_task:
+            try:
+                await asyncio.wait_for(self._stderr_task, 1)
+            except asyncio.TimeoutError:
+                pass
+
+class ServerPool:
+    """A fixed set of initialized MCPClients handed out one test at a time, so
+    tests skip the server's interpreter start-up and initialize handshake"""
+
+    def __init__(self, server_path, safe_root, size=3, debug=None, on_stderr=None):
+        self._start = lambda: _started(server_path, safe_root, debug, on_stderr)
+        self._idle = queue.Queue()
+        # Servers start concurrently, so a pool is ready in about one start-up time
+        with ThreadPoolExecutor(max_workers=size) as pool:
+            for client in pool.map(lambda _: self._start(), range(size)):
+                self._idle.put(client)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @contextmanager
+    def lease(self):
+        """Borrow a warm server; it goes back to the pool afterwards. A server whose
+        user raised may still be busy with a request, so it is replaced instead."""
+        client = self._idle.get()
+        try:
+            yield client
+        except BaseException:
+            client.close(graceful=False)
+            try:
+                self._idle.put(self._start())
+            except Exception:
+                pass  # No replacement: the pool shrinks by one, and the user's error is what's raised
+            raise
+        else:
+            self._idle.put(client)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+def _started(server_path, safe_root, debug=None, on_stderr=None):
+    client = MCPClient(server_path, safe_root, debug, on_stderr)
+    client.initialize()
+    return client
+
+class InProcessClient:
+    """MCPClient counterpart that dispatches straight into an imported server module -
+    no interpreter start-up, but also no timeouts, so only for bounded requests"""
+    def __init__(self, safe_root, debug=None):
+        import safe_shell_mcp
+        if debug is None:
+            debug = DEBUG
+        self.server = safe_shell_mcp.build_server(safe_root, debug)
+        self._next_id = 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def request(self, method, params=None, on_progress=None):
+        """Dispatch one request and return its response"""
+        msg = {"jsonrpc": "2.0", "id": self._next_id, "method": method}
+        self._next_id += 1
+        if params is not None:
+            msg["params"] = params
+        seen = len(self.server.notifications)
+        response = self.server.dispatch(msg)
+        if on_progress:
+            for note in self.server.notifications[seen:]:
+                on_progress(note.get("params", {}))
+        return response
+
+    def initialize(self, params=None):
+        return self.request("initialize", params or {})
+
+    def call(self, name, arguments=None, on_progress=None):
+        """Run a tools/call request and return the full response message"""
+        return self.request("tools/call", {"name": name, "arguments": arguments or {}}, on_progress)
+
+    def close(self):
+        self.server.dispatch({"jsonrpc": "2.0", "id": self._next_id, "method": "shutdown"})
+
+def result_text(response, default=""):
+    """Extract the first text block from a tools/call response"""
+    content = (response or {}).get("result", {}).get("content", [])
+    if content:
+        return content[0].get("text", default)
+    return default
@@ -9,6 +9,8 @@ import sys
 import time
 from pathlib import Path
 
+from mcp_test_client import dumps, loads
+
 def quick_streaming_test():
     """Simple test to show streaming works"""
     print("🔄 Quick Streaming Test")
@@ -25,18 +27,17 @@ def quick_streaming_test():
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1
+            bufsize=65536
         )
         
         # Send initialize
         init_msg = {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}}
-        server_proc.stdin.write(json.dumps(init_msg) + "\n")
+        server_proc.stdin.write(dumps(init_msg) + b"\n")
         server_proc.stdin.flush()
         
         # Read init response
         init_response = server_proc.stdout.readline()
-        print(f"✅ Server initialized: {json.loads(init_response)['result']['serverInfo']['name']}")
+        print(f"✅ Server initialized: {loads(init_response)['result']['serverInfo']['name']}")
         
         # Send streaming command
         stream_msg = {
@@ -52,7 +53,7 @@ def quick_streaming_test():
                 }
             }
         }
-        server_proc.stdin.write(json.dumps(stream_msg) + "\n")
+        server_proc.stdin.write(dumps(stream_msg) + b"\n")
         server_proc.stdin.flush()
         
         print("📤 Sent streaming command, watching for progress updates...")
@@ -68,7 +69,7 @@ def quick_streaming_test():
                 break
                 
             try:
-                resp_data = json.loads(response)
+                resp_data = loads(response)
                 
                 if "method" in resp_data and resp_data["method"] == "$/progress":
                     progress_count += 1
@@ -79,7 +80,7 @@ def quick_streaming_test():
                     break
                     
             except json.JSONDecodeError:
-                print(f"❌ Invalid JSON: {response}")
+                print(f"❌ Invalid JSON: {response.decode(errors='replace')}")
         
         # Shutdown
         server_proc.terminate()
@@ -6,12 +6,9 @@ import argparse, json, os, re, subprocess, sys, traceback, datetime, threading,
 from pathlib import Path
 
 # ============================================================================== CLI Config ==============================================================================
-parser = argparse.ArgumentParser(description="Secure STDIO MCP Shell Server")
-parser.add_argument("--saferoot", "-r", required=True, help="Restrict access to this folder only")
-parser.add_argument("--debug", "-d", action="store_true", help="Enable debug logging to stderr")
-args = parser.parse_args()
-SAFE_ROOT = Path(args.saferoot).resolve()
-DEBUG_MODE = args.debug
+# Set by configure() - from the command line when run as a script, or by build_server() in-process
+SAFE_ROOT = None
+DEBUG_MODE = False
 DEFAULT_TIMEOUT = 300  # 5 minutes timeout for run_shell and run_raw commands
 STREAMING_TIMEOUT = 180  # 3 minutes for streaming operations
 BACKGROUND_TASK_TIMEOUT = 1800  # 30 minutes for background tasks
@@ -25,9 +22,20 @@ RUN_SHELL_TIMEOUT = 300  # 5 minutes - specific timeout for run_shell and run_ra
 BUILD_VERSION = "2025-10-16-v6.0-PERSISTENT-BACKGROUND-TASKS"
 SERVER = {"name": "safe-shell-mcp", "version": "1.4.0", "build": BUILD_VERSION}
 
-if not SAFE_ROOT.is_dir():
-    sys.stderr.write(f"❌ SAFE_ROOT '{SAFE_ROOT}' must exist and be a directory.\n")
-    sys.exit(1)
+def configure(safe_root, debug=False):
+    """Point the server at its safe root - raises NotADirectoryError if it is not a directory"""
+    global SAFE_ROOT, DEBUG_MODE, TASK_STORAGE_FILE
+    root = Path(safe_root).resolve()
+    if not root.is_dir():
+        raise NotADirectoryError(f"SAFE_ROOT '{root}' must exist and be a directory.")
+    SAFE_ROOT, DEBUG_MODE = root, debug
+    TASK_STORAGE_FILE = None  # Re-derived from the new SAFE_ROOT on next use
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Secure STDIO MCP Shell Server")
+    parser.add_argument("--saferoot", "-r", required=True, help="Restrict access to this folder only")
+    parser.add_argument("--debug", "-d", action="store_true", help="Enable debug logging to stderr")
+    return parser.parse_args(argv)
 
 # ============================================================================== Debug Logging ==============================================================================
 def _debug_log(message):
@@ -476,16 +484,16 @@ def _stream_command_output(command, request_id, timeout=STREAMING_TIMEOUT):
         _progress(request_id, f"🚀 Starting command: {command}")
         
         # Create process with process group for better control
+        # Output is read as raw bytes and split into lines by _PipeLineReader
         process = subprocess.Popen(
             ["/bin/bash", "-c", command],
             cwd=str(SAFE_ROOT),
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,
-            universal_newlines=True,
+            bufsize=0,
             preexec_fn=os.setsid if hasattr(os, 'setsid') else None  # Create new process group
         )
+        reader = _PipeLineReader(process.stdout)
         
         output_lines = []
         start_time = time.time()
@@ -515,7 +523,7 @@ def _stream_command_output(command, request_id, timeout=STREAMING_TIMEOUT):
                 break
             
             # Try to read a line with timeout
-            line = _read_with_timeout(process, READLINE_TIMEOUT)
+            line = reader.readline(READLINE_TIMEOUT)
             
             if line is not None:
                 if line:  # Non-empty line
@@ -600,9 +608,9 @@ def _stream_command_output(command, request_id, timeout=STREAMING_TIMEOUT):
         # Read any remaining output with timeout protection
         if process.stdout and not process.stdout.closed:
             try:
-                remaining_start = time.time()
-                while time.time() - remaining_start < ERROR_RECOVERY_TIMEOUT:
-                    remaining = process.stdout.readline()
+                remaining_deadline = time.time() + ERROR_RECOVERY_TIMEOUT
+                while time.time() < remaining_deadline:
+                    remaining = reader.readline(max(0, remaining_deadline - time.time()))
                     if not remaining:
                         break
                     if remaining.strip():
@@ -760,6 +768,44 @@ def _read_with_timeout(process, timeout=READLINE_TIMEOUT):
             return None
     return None  # Timeout
 
+class _PipeLineReader:
+    """Splits lines out of a non-blocking pipe fd using bulk os.read() calls"""
+    def __init__(self, pipe):
+        self.fd = pipe.fileno()
+        os.set_blocking(self.fd, False)
+        self.buf = bytearray()
+        self.eof = False
+
+    def readline(self, timeout=READLINE_TIMEOUT):
+        """Return the next decoded line, "" at EOF, or None if nothing arrived within timeout"""
+        deadline = time.time() + timeout
+        while True:
+            i = self.buf.find(b"\n")
+            if i >= 0:
+                line = bytes(self.buf[:i + 1])
+                del self.buf[:i + 1]
+                return line.decode("utf-8", errors="replace")
+            if self.eof:
+                # Flush a trailing line without newline, then report EOF
+                line = bytes(self.buf)
+                self.buf.clear()
+                return line.decode("utf-8", errors="replace")
+
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None  # Timeout
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if not ready:
+                return None  # Timeout
+            try:
+                chunk = os.read(self.fd, 65536)
+            except BlockingIOError:
+                continue
+            if chunk:
+                self.buf += chunk
+            else:
+                self.eof = True
+
 def _read_with_timeout_threaded(process, timeout=READLINE_TIMEOUT):
     """Fallback threaded implementation for reading with timeout"""
     result = [None]
@@ -837,12 +883,34 @@ def _terminate_process_group(process):
                 _debug_log(f"Final termination attempt failed: {final_e}")
 
 # ============================================================================== Core MCP Utilities ==============================================================================
-def _send(msg): 
-    _debug_log(f"Sending MCP message: {json.dumps(msg, separators=(',', ':'))}")
-    json.dump(msg, sys.stdout, separators=(",", ":")); sys.stdout.write("\n"); sys.stdout.flush()
-def _result(rid, payload): _send({"jsonrpc": "2.0", "id": rid, "result": payload})
-def _error(rid, code, msg, data=None): _send({"jsonrpc": "2.0", "id": rid, "error": {"code": code, "message": msg, "data": data}})
-def _progress(rid, text): _send({"jsonrpc": "2.0", "method": "$/progress", "params": {"id": rid, "output": text}})
+# Fixed-shape frames for the highest-volume messages - only the id/text are encoded per call
+_EMPTY_RESULT_TMPL = '{"jsonrpc":"2.0","id":%s,"result":{}}\n'
+_PROGRESS_TMPL = '{"jsonrpc":"2.0","method":"$/progress","params":{"id":%s,"output":%s}}\n'
+
+# In-process servers (see build_server) collect outgoing lines here instead of writing stdout
+_LINE_SINK = None
+
+def _send_line(line):
+    _debug_log(f"Sending MCP message: {line.rstrip()}")
+    if _LINE_SINK is not None:
+        return _LINE_SINK.append(line)
+    sys.stdout.write(line); sys.stdout.flush()
+def _send(msg):
+    _send_line(json.dumps(msg, separators=(",", ":")) + "\n")
+# Responses are collected here while a JSON-RPC batch is being dispatched
+_BATCH_RESPONSES = None
+
+def _reply(msg):
+    if _BATCH_RESPONSES is not None:
+        _BATCH_RESPONSES.append(msg)
+    else:
+        _send(msg)
+def _result(rid, payload):
+    if payload == {} and _BATCH_RESPONSES is None:
+        return _send_line(_EMPTY_RESULT_TMPL % json.dumps(rid))
+    _reply({"jsonrpc": "2.0", "id": rid, "result": payload})
+def _error(rid, code, msg, data=None): _reply({"jsonrpc": "2.0", "id": rid, "error": {"code": code, "message": msg, "data": data}})
+def _progress(rid, text): _send_line(_PROGRESS_TMPL % (json.dumps(rid), json.dumps(text)))
 def _read(): 
     line = sys.stdin.readline()
     if line:
@@ -1059,8 +1127,12 @@ def _run_shell_handler(params):
     # Handle background tasks
     if background:
         task_id = _create_background_task(command)
+        task = _get_background_task(task_id)
+        status = task.status if task else "unknown"
         _cleanup_completed_tasks()  # Clean up old tasks
-        return f"{warning_msg}🔄 Background task started with ID: {task_id}\nUse 'task_status' or 'task_output' tools to check progress."
+        text = f"{warning_msg}🔄 Background task started with ID: {task_id}\nUse 'task_status' or 'task_output' tools to check progress."
+        # Return (text, structuredContent) so clients can read the task ID without parsing the text
+        return text, {"task_id": task_id, "status": status}
     
     # Handle streaming output
     if stream:
@@ -1262,7 +1334,7 @@ TOOLS = {
 # ============================================================================== MCP Handlers ==============================================================================
 def _handle_initialize(rid, _): 
     _debug_log("Handling initialize request")
-    _result(rid, {"serverInfo": SERVER, "capabilities": {"tools": True}})
+    _result(rid, {"serverInfo": SERVER, "capabilities": {"tools": True, "experimental": {"batch_operations": True}}})
 
 def _handle_tools_list(rid): 
     _debug_log("Handling tools/list request")
@@ -1301,6 +1373,11 @@ def _handle_tools_call(rid, prm):
         elapsed = time.time() - start_time
         _debug_log(f"Tool execution completed successfully in {elapsed:.1f}s")
         
+        # Handlers may return (text, structuredContent) for machine-readable fields
+        structured = None
+        if isinstance(output, tuple):
+            output, structured = output
+        
         # Validate output
         if output is None:
             output = f"⚠️ Tool '{name}' completed but returned no output"
@@ -1315,6 +1392,8 @@ def _handle_tools_call(rid, prm):
         
         # Return raw text content
         final = {"content": [{"type": "text", "text": output}]}
+        if structured is not None:
+            final["structuredContent"] = structured
         _result(rid, final)
         
     except subprocess.TimeoutExpired as e:
@@ -1489,6 +1568,58 @@ def _handle_task_terminate(params):
     return f"🛑 Task '{task_id}' has been terminated"
     
 # ============================================================================== Main Loop ==============================================================================
+def _dispatch(msg):
+    """Handle a single JSON-RPC message - returns False once the client asked to exit"""
+    m, rid, prm = msg.get("method"), msg.get("id"), msg.get("params", {})
+    _debug_log(f"Processing method: {m}, id: {rid}")
+    
+    try:
+        if m == "initialize": 
+            _handle_initialize(rid, prm)
+        elif m == "tools/list": 
+            _handle_tools_list(rid)
+        elif m == "tools/call": 
+            _handle_tools_call(rid, prm)
+        elif m == "shutdown": 
+            _debug_log("Shutdown requested")
+            _result(rid, {})
+        elif m == "exit": 
+            _debug_log("Exit requested")
+            return False
+        else: 
+            _debug_log(f"Unknown method: {m}")
+            _error(rid, -32601, f"Unknown method: {m}")
+    except Exception as e: 
+        _debug_log(f"Unhandled MCP error: {e}")
+        _error(rid, -32099, "Unhandled MCP error", traceback.format_exc())
+    return True
+
+def _dispatch_batch(batch):
+    """Handle a JSON-RPC batch in order and answer with a single response array"""
+    global _BATCH_RESPONSES
+    if not batch:
+        _error(None, -32600, "Invalid Request", "Empty batch")
+        return True
+    
+    _debug_log(f"Processing batch of {len(batch)} messages")
+    keep_running = True
+    _BATCH_RESPONSES = []
+    try:
+        for msg in batch:
+            if not isinstance(msg, dict):
+                _error(None, -32600, "Invalid Request", "Batch entries must be objects")
+                continue
+            if not _dispatch(msg):
+                keep_running = False
+                break
+    finally:
+        responses, _BATCH_RESPONSES = _BATCH_RESPONSES, None
+    
+    # Notifications produce no response; an all-notification batch gets no reply
+    if responses:
+        _send(responses)
+    return keep_running
+
 def main():
     _debug_log(f"🚀 Starting MCP server - Build: {BUILD_VERSION}")
     _debug_log(f"Server: {SERVER['name']} v{SERVER['version']}")
@@ -1507,34 +1638,63 @@ def main():
     
     while True:
         msg = _read()
-        if not msg: 
+        if msg is None: 
             _debug_log("No message received, breaking main loop")
             break
-            
-        m, rid, prm = msg.get("method"), msg.get("id"), msg.get("params", {})
-        _debug_log(f"Processing method: {m}, id: {rid}")
         
+        if isinstance(msg, list):
+            keep_running = _dispatch_batch(msg)
+        elif isinstance(msg, dict):
+            keep_running = _dispatch(msg)
+        else:
+            _error(None, -32600, "Invalid Request", "Expected an object or a batch array")
+            keep_running = True
+        if not keep_running:
+            break
+
+class InProcessServer:
+    """Drives the JSON-RPC dispatcher directly, without a STDIO process boundary"""
+    def __init__(self):
+        self.notifications = []  # $/progress messages emitted while dispatching
+    
+    def dispatch(self, msg):
+        """Handle one message (or batch) and return its reply - None for notifications"""
+        global _LINE_SINK
+        lines, _LINE_SINK = [], []
         try:
-            if m == "initialize": 
-                _handle_initialize(rid, prm)
-            elif m == "tools/list": 
-                _handle_tools_list(rid)
-            elif m == "tools/call": 
-                _handle_tools_call(rid, prm)
-            elif m == "shutdown": 
-                _debug_log("Shutdown requested")
-                _result(rid, {})
-            elif m == "exit": 
-                _debug_log("Exit requested")
-                break
-            else: 
-                _debug_log(f"Unknown method: {m}")
-                _error(rid, -32601, f"Unknown method: {m}")
-        except Exception as e: 
-            _debug_log(f"Unhandled MCP error: {e}")
-            _error(rid, -32099, "Unhandled MCP error", traceback.format_exc())
+            if isinstance(msg, list):
+                _dispatch_batch(msg)
+            else:
+                _dispatch(msg)
+        finally:
+            lines, _LINE_SINK = _LINE_SINK, None
+        
+        reply = None
+        for line in lines:
+            out = json.loads(line)
+            if isinstance(out, dict) and out.get("method") == "$/progress":
+                self.notifications.append(out)
+            else:
+                reply = out
+        return reply
+
+def build_server(safe_root, debug=False):
+    """Configure this module for `safe_root` and return an in-process server.
+    Server state is module-global, so only one root is active per interpreter."""
+    configure(safe_root, debug)
+    try:
+        _load_tasks_from_disk()
+    except Exception as e:
+        _debug_log(f"Error loading tasks on startup: {e}")
+    return InProcessServer()
 
 if __name__ == "__main__":
+    args = _parse_args()
+    try:
+        configure(args.saferoot, args.debug)
+    except NotADirectoryError as e:
+        sys.stderr.write(f"❌ {e}\n")
+        sys.exit(1)
     try: 
         main()
     except KeyboardInterrupt: 
@@ -3,21 +3,20 @@
 Test script to validate the anti-hang fixes
 """
 
-import json
-import subprocess
-import sys
 import time
-import threading
 from pathlib import Path
 
+from mcp_test_client import MCPClient
+
+_HERE = Path(__file__).resolve().parent
+_SERVER = str(_HERE / "safe_shell_mcp.py")
+_SAFE_ROOT = str(_HERE.parent)
+
 def test_anti_hang_improvements():
     """Test the anti-hang improvements"""
     print("🚨 Testing Anti-Hang Improvements")
     print("=" * 40)
     
-    server_path = Path(__file__).parent / "safe_shell_mcp.py"
-    safe_root = Path(__file__).parent.parent
-    
     test_cases = [
         {
             "name": "Original problematic curl command",
@@ -66,74 +65,27 @@ def test_anti_hang_improvements():
         success = False
         start_time = time.time()
         
+        client = None
         try:
-            # Start fresh server for each test
-            server_proc = subprocess.Popen(
-                [sys.executable, str(server_path), "--saferoot", str(safe_root), "--debug"],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1
-            )
-            
-            # Collect stderr for debugging
-            stderr_output = []
-            def read_stderr():
-                while True:
-                    line = server_proc.stderr.readline()
-                    if not line:
-                        break
-                    stderr_output.append(line.strip())
-            
-            stderr_thread = threading.Thread(target=read_stderr, daemon=True)
-            stderr_thread.start()
+            # Start fresh server for each test; its debug output is collected by the client
+            client = MCPClient(_SERVER, _SAFE_ROOT)
             
             # Initialize
-            init_msg = {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}}
-            server_proc.stdin.write(json.dumps(init_msg) + "\n")
-            server_proc.stdin.flush()
-            
-            # Read init response
-            init_response = server_proc.stdout.readline()
+            client.initialize()
             
-            # Send test command
-            cmd_msg = {
-                "jsonrpc": "2.0",
-                "id": 2,
-                "method": "tools/call",
-                "params": {
-                    "name": "run_shell",
-                    "arguments": {
-                        "command": test_case['command'],
-                        "stream": test_case['stream'],
-                        "request_id": f"test_{i}"
-                    }
-                }
-            }
-            
-            server_proc.stdin.write(json.dumps(cmd_msg) + "\n")
-            server_proc.stdin.flush()
-            
-            # Read response with timeout
-            response = None
+            # Send test command and read response with timeout
             progress_updates = 0
+            def on_progress(params):
+                nonlocal progress_updates
+                progress_updates += 1
+                print(f"     Progress: {params.get('output', '')}")
             
-            while time.time() - start_time < test_case['max_wait']:
-                line = server_proc.stdout.readline()
-                if line:
-                    try:
-                        msg = json.loads(line)
-                        if msg.get('id') == 2:
-                            response = msg
-                            break
-                        elif msg.get('method') == '$/progress':
-                            progress_updates += 1
-                            print(f"     Progress: {msg.get('params', {}).get('output', '')}")
-                    except json.JSONDecodeError:
-                        continue
-                else:
-                    time.sleep(0.1)
+            remaining = test_case['max_wait'] - (time.time() - start_time)
+            response = client.call("run_shell", {
+                "command": test_case['command'],
+                "stream": test_case['stream'],
+                "request_id": f"test_{i}"
+            }, timeout=max(0, remaining), on_progress=on_progress)
             
             elapsed = time.time() - start_time
             
@@ -157,14 +109,6 @@ def test_anti_hang_improvements():
                     print(f"   ℹ️ This timeout was expected for this test case")
                     success = True  # Expected behavior
             
-            # Cleanup
-            try:
-                server_proc.terminate()
-                server_proc.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                server_proc.kill()
-                server_proc.wait()
-            
             results.append({
                 'test': test_case['name'],
                 'success': success,
@@ -181,14 +125,10 @@ def test_anti_hang_improvements():
                 'elapsed': elapsed,
                 'error': str(e)
             })
-            
-            # Cleanup on exception
-            try:
-                if 'server_proc' in locals():
-                    server_proc.terminate()
-                    server_proc.wait(timeout=2)
-            except:
-                pass
+        finally:
+            # Cleanup
+            if client:
+                client.close(graceful=False)
     
     # Summary
     print(f"\n📊 Test Results Summary")
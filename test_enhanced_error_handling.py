@@ -4,194 +4,278 @@ Test script for enhanced error handling in MCP Shell Server
 Tests various error scenarios to ensure robust error handling
 """
 
-import json
 import subprocess
 import sys
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from mcp_test_client import MCPClient
+
 class ErrorHandlingTester:
-    def __init__(self, server_path, safe_root):
+    def __init__(self, server_path, safe_root, max_workers=4):
         self.server_path = server_path
         self.safe_root = safe_root
+        self.max_workers = max_workers
         self.test_results = []
+        self._local = threading.local()  # One server per worker thread
+        self._clients = []
+        self._clients_lock = threading.Lock()
         
-    def run_test(self, test_name, tool_name, params=None):
-        """Run a single test and capture results"""
-        if params is None:
-            params = {}
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        with self._clients_lock:
+            clients, self._clients = self._clients, []
+        for client in clients:
+            client.close()
+    
+    @property
+    def client(self):
+        """The calling worker's MCP server, started on first use"""
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._start_server()
+        return client
+    
+    def _start_server(self):
+        """Launch one MCP server for this worker and complete the initialize handshake"""
+        client = MCPClient(self.server_path, self.safe_root)
+        client.initialize()
+        self._local.client = client
+        with self._clients_lock:
+            self._clients.append(client)
+        return client
+    
+    def _restart_server(self):
+        """Replace this worker's server, e.g. when it is still busy with a timed-out request"""
+        client = self._local.client
+        with self._clients_lock:
+            self._clients.remove(client)
+        client.close(graceful=False)
+        self._local.client = None
         
-        print(f"\n🧪 Testing: {test_name}")
+    def _analyze(self, log, test_name, response, stderr=""):
+        """Classify one tools/call response; returns the report lines and result record"""
+        # Analyze results
+        success = True
+        error_handled = False
+        timeout_handled = False
         
-        # Prepare messages
-        init_msg = {
-            "jsonrpc": "2.0",
-            "id": 0,
-            "method": "initialize",
-            "params": {}
-        }
+        if "error" in response:
+            error_handled = True
+            error_msg = response["error"].get("message", "")
+            log.append(f"  ✅ Error properly handled: {error_msg}")
+        elif "result" in response:
+            content = response["result"].get("content", [])
+            if content and len(content) > 0:
+                text = content[0].get("text", "")
+                if "timeout" in text.lower() or "terminated" in text.lower():
+                    timeout_handled = True
+                    log.append(f"  ✅ Timeout properly handled")
+                elif "error" in text.lower() or "❌" in text:
+                    error_handled = True
+                    log.append(f"  ✅ Error properly handled in output")
+                else:
+                    log.append(f"  ℹ️ Result: {text[:100]}{'...' if len(text) > 100 else ''}")
         
-        tool_msg = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "tools/call",
-            "params": {
-                "name": tool_name,
-                "arguments": params
-            }
+        if stderr:
+            log.append(f"  📝 Debug output available (length: {len(stderr)})")
+        
+        return log, {
+            "test": test_name,
+            "success": success,
+            "error_handled": error_handled,
+            "timeout_handled": timeout_handled,
+            "stderr_length": len(stderr)
         }
+
+    def run_test(self, test_name, tool_name, params=None):
+        """Run a single test; returns its report lines and result record"""
+        if params is None:
+            params = {}
+        
+        log = [f"\n🧪 Testing: {test_name}"]
         
         try:
-            # Start MCP server
-            proc = subprocess.Popen(
-                ["python3", self.server_path, "--saferoot", self.safe_root, "--debug"],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            
-            # Send messages
-            input_data = json.dumps(init_msg) + "\n" + json.dumps(tool_msg) + "\n"
-            stdout, stderr = proc.communicate(input=input_data, timeout=30)
+            client = self.client
+            stderr_start = len(client.stderr_lines)
+            response = client.call(tool_name, params, timeout=30)
             
-            # Parse responses
-            responses = []
-            for line in stdout.strip().split('\n'):
-                if line:
-                    try:
-                        responses.append(json.loads(line))
-                    except json.JSONDecodeError:
-                        pass
+            if response is None:
+                log.append(f"  ⏱️ Test timed out (expected for some tests)")
+                self._restart_server()
+                return log, {
+                    "test": test_name,
+                    "success": True,
+                    "error_handled": True,
+                    "timeout_handled": True,
+                    "stderr_length": 0
+                }
             
-            # Analyze results
-            success = len(responses) >= 2
-            error_handled = False
-            timeout_handled = False
-            
-            for response in responses:
-                if "error" in response:
-                    error_handled = True
-                    error_msg = response["error"].get("message", "")
-                    print(f"  ✅ Error properly handled: {error_msg}")
-                elif "result" in response and response.get("id") == 1:
-                    content = response["result"].get("content", [])
-                    if content and len(content) > 0:
-                        text = content[0].get("text", "")
-                        if "timeout" in text.lower() or "terminated" in text.lower():
-                            timeout_handled = True
-                            print(f"  ✅ Timeout properly handled")
-                        elif "error" in text.lower() or "❌" in text:
-                            error_handled = True
-                            print(f"  ✅ Error properly handled in output")
-                        else:
-                            print(f"  ℹ️ Result: {text[:100]}{'...' if len(text) > 100 else ''}")
-            
-            if stderr:
-                print(f"  📝 Debug output available (length: {len(stderr)})")
-            
-            self.test_results.append({
-                "test": test_name,
-                "success": success,
-                "error_handled": error_handled,
-                "timeout_handled": timeout_handled,
-                "stderr_length": len(stderr)
-            })
+            stderr = "\n".join(client.stderr_lines[stderr_start:])
+            return self._analyze(log, test_name, response, stderr)
             
-        except subprocess.TimeoutExpired:
-            print(f"  ⏱️ Test timed out (expected for some tests)")
-            proc.kill()
-            self.test_results.append({
-                "test": test_name,
-                "success": True,
-                "error_handled": True,
-                "timeout_handled": True,
-                "stderr_length": 0
-            })
         except Exception as e:
-            print(f"  ❌ Test failed: {e}")
-            self.test_results.append({
+            log.append(f"  ❌ Test failed: {e}")
+            return log, {
                 "test": test_name,
                 "success": False,
                 "error_handled": False,
                 "timeout_handled": False,
                 "stderr_length": 0
-            })
+            }
+
+    def run_batch(self, cases, timeout=60):
+        """Run bounded cases as one JSON-RPC batch on a single server.
+        Returns None when the server does not advertise batch support."""
+        logs = [[f"\n🧪 Testing: {name}"] for name, _, _ in cases]
+        
+        with MCPClient(self.server_path, self.safe_root) as client:
+            init = client.initialize() or {}
+            capabilities = init.get("result", {}).get("capabilities", {})
+            if not capabilities.get("experimental", {}).get("batch_operations"):
+                return None
+            
+            ids = client.request_batch([
+                ("tools/call", {"name": tool, "arguments": params or {}})
+                for _, tool, params in cases
+            ])
+            # One deadline for the whole batch reply, not one per id
+            responses = client.recv_all(ids, timeout)
+        
+        reports = []
+        for log, (name, _, _), rid in zip(logs, cases, ids):
+            response = responses.get(rid)
+            if response is None:
+                log.append(f"  ❌ Test failed: no response in batch")
+                reports.append((log, {
+                    "test": name,
+                    "success": False,
+                    "error_handled": False,
+                    "timeout_handled": False,
+                    "stderr_length": 0
+                }))
+            else:
+                reports.append(self._analyze(log, name, response))
+        return reports
+
+    def run_protocol_test(self, test_name, payload, expected, exits=False, timeout=10):
+        """Send one raw JSON-RPC payload on a fresh server and check the replies.
+        `expected` maps each response id to an error code, "result", or None when
+        no response may arrive; `exits` means the server must stop afterwards."""
+        log = [f"\n🧪 Testing: {test_name}"]
+        with MCPClient(self.server_path, self.safe_root) as client:
+            client.initialize()
+            client.send(payload)
+            # recv_all returns early once the server closes stdout
+            responses = client.recv_all(list(expected), timeout)
+            if exits:
+                try:
+                    client.proc.wait(timeout)
+                except subprocess.TimeoutExpired:
+                    pass
+            exited = client.proc.poll() is not None
+        
+        problems = []
+        for rid, want in expected.items():
+            response = responses.get(rid)
+            if want is None:
+                if response is not None:
+                    problems.append(f"unexpected response for id {rid}: {response}")
+            elif response is None:
+                problems.append(f"no response for id {rid}")
+            elif want == "result":
+                if "result" not in response:
+                    problems.append(f"id {rid} failed: {response.get('error')}")
+            elif response.get("error", {}).get("code") != want:
+                problems.append(f"id {rid}: expected error {want}, got {response}")
+        if exits != exited:
+            problems.append("server kept running" if exits else "server exited")
+        
+        for problem in problems:
+            log.append(f"  ❌ {problem}")
+        if not problems:
+            log.append(f"  ✅ Replies: {sorted(responses, key=str)}{' - server exited' if exited else ''}")
+        return log, {
+            "test": test_name,
+            "success": not problems,
+            "error_handled": not problems,
+            "timeout_handled": False,
+            "stderr_length": 0
+        }
 
     def run_all_tests(self):
         """Run comprehensive error handling tests"""
         print("🚀 Starting Enhanced Error Handling Tests")
         print("=" * 50)
         
-        # Test 1: Invalid command
-        self.run_test(
-            "Invalid Command",
-            "run_shell",
-            {"command": "nonexistent_command_12345"}
-        )
-        
-        # Test 2: Command that times out quickly
-        self.run_test(
-            "Timeout Command",
-            "run_shell",
-            {"command": "sleep 100"}  # Should timeout with our reduced timeouts
-        )
-        
-        # Test 3: Command with permission error
-        self.run_test(
-            "Permission Error",
-            "cat_file",
-            {"filepath": "/etc/shadow"}  # Typically requires root
-        )
-        
-        # Test 4: Network command (should have shorter timeout)
-        self.run_test(
-            "Network Command Timeout",
-            "run_shell",
-            {"command": "curl --max-time 60 https://httpstat.us/200?sleep=70000"}  # Should timeout
-        )
-        
-        # Test 5: File not found
-        self.run_test(
-            "File Not Found",
-            "cat_file",
-            {"filepath": "nonexistent_file_12345.txt"}
-        )
-        
-        # Test 6: Invalid regex pattern
-        self.run_test(
-            "Invalid Regex",
-            "file_search",
-            {"pattern": "[unclosed", "root": "."}
-        )
-        
-        # Test 7: Directory outside safe root
-        self.run_test(
-            "Path Security Error",
-            "list_dir",
-            {"path": "../../etc"}
-        )
-        
-        # Test 8: Interactive command detection
-        self.run_test(
-            "Interactive Command Detection",
-            "run_shell",
-            {"command": "sudo echo 'test'"}
-        )
-        
-        # Test 9: Background task that fails
-        self.run_test(
-            "Background Task Error",
-            "run_shell",
-            {"command": "false", "background": True}
-        )
-        
-        # Test 10: Streaming command with error
-        self.run_test(
-            "Streaming Command Error",
-            "run_shell",
-            {"command": "bash -c 'echo start; sleep 2; exit 1'", "stream": True}
-        )
+        # (name, tool, params, may_hang) - the server handles a batch sequentially,
+        # so cases that can block for a long time stay out of it
+        cases = [
+            # Test 1: Invalid command
+            ("Invalid Command", "run_shell", {"command": "nonexistent_command_12345"}, False),
+            # Test 2: Command that times out quickly
+            ("Timeout Command", "run_shell", {"command": "sleep 100"}, True),  # Should timeout with our reduced timeouts
+            # Test 3: Command with permission error
+            ("Permission Error", "cat_file", {"filepath": "/etc/shadow"}, False),  # Typically requires root
+            # Test 4: Network command (should have shorter timeout)
+            ("Network Command Timeout", "run_shell",
+             {"command": "curl --max-time 60 https://httpstat.us/200?sleep=70000"}, True),  # Should timeout
+            # Test 5: File not found
+            ("File Not Found", "cat_file", {"filepath": "nonexistent_file_12345.txt"}, False),
+            # Test 6: Invalid regex pattern
+            ("Invalid Regex", "file_search", {"pattern": "[unclosed", "root": "."}, False),
+            # Test 7: Directory outside safe root
+            ("Path Security Error", "list_dir", {"path": "../../etc"}, False),
+            # Test 8: Interactive command detection
+            ("Interactive Command Detection", "run_shell", {"command": "sudo echo 'test'"}, False),
+            # Test 9: Background task that fails
+            ("Background Task Error", "run_shell", {"command": "false", "background": True}, False),
+            # Test 10: Streaming command with error
+            ("Streaming Command Error", "run_shell",
+             {"command": "bash -c 'echo start; sleep 2; exit 1'", "stream": True}, False),
+        ]
+        
+        # (name, raw payload, expected replies by id, server must exit) - malformed
+        # messages and batches; each gets its own server since one of them exits it
+        protocol_cases = [
+            ("Empty Batch", [], {None: -32600}),
+            ("Non-object Batch Entry",
+             [1, {"jsonrpc": "2.0", "id": 101, "method": "tools/list"}],
+             {None: -32600, 101: "result"}),
+            ("Non-object Message", 42, {None: -32600}),
+            # Requests after exit are never answered and the server stops
+            ("Exit Inside Batch",
+             [{"jsonrpc": "2.0", "id": 101, "method": "shutdown"},
+              {"jsonrpc": "2.0", "method": "exit"},
+              {"jsonrpc": "2.0", "id": 102, "method": "tools/list"}],
+             {101: "result", 102: None}, True),
+        ]
+        
+        # Bounded cases share one batch on one server; the rest run on a small pool
+        # of servers alongside it. Reports are printed in the original order.
+        reports = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            slow = {i: pool.submit(self.run_test, *case[:3])
+                    for i, case in enumerate(cases) if case[3]}
+            protocol = [pool.submit(self.run_protocol_test, *case) for case in protocol_cases]
+            quick = [i for i, case in enumerate(cases) if not case[3]]
+            
+            batched = self.run_batch([cases[i][:3] for i in quick])
+            if batched is None:
+                print("ℹ️ Server does not support batches - running cases individually")
+                batched = list(pool.map(lambda i: self.run_test(*cases[i][:3]), quick))
+            
+            reports.update(zip(quick, batched))
+            reports.update((i, job.result()) for i, job in slow.items())
+            reports.update((len(cases) + i, job.result()) for i, job in enumerate(protocol))
+        
+        for i in range(len(reports)):
+            log, result = reports[i]
+            print("\n".join(log))
+            self.test_results.append(result)
         
         # Print summary
         self.print_summary()
@@ -202,19 +286,23 @@ class ErrorHandlingTester:
         print("📊 Test Results Summary")
         print("=" * 50)
         
+        # One pass over the results for both the counters and the detail lines
         total_tests = len(self.test_results)
-        successful_tests = sum(1 for r in self.test_results if r["success"])
-        error_handled_tests = sum(1 for r in self.test_results if r["error_handled"])
+        successful_tests = error_handled_tests = 0
+        details = []
+        for result in self.test_results:
+            successful_tests += result["success"]
+            error_handled_tests += result["error_handled"]
+            status = "✅" if result["success"] else "❌"
+            error_status = "✅" if result["error_handled"] else "❌"
+            details.append(f"  {status} {result['test']:<25} | Error Handling: {error_status}")
         
         print(f"Total Tests: {total_tests}")
         print(f"Successful: {successful_tests}/{total_tests}")
         print(f"Error Handling: {error_handled_tests}/{total_tests}")
         
         print("\nDetailed Results:")
-        for result in self.test_results:
-            status = "✅" if result["success"] else "❌"
-            error_status = "✅" if result["error_handled"] else "❌"
-            print(f"  {status} {result['test']:<25} | Error Handling: {error_status}")
+        print("\n".join(details))
         
         if successful_tests == total_tests and error_handled_tests >= total_tests * 0.8:
             print("\n🎉 Enhanced error handling tests PASSED!")
@@ -233,8 +321,8 @@ def main():
         print(f"❌ Safe root path '{safe_root}' does not exist")
         sys.exit(1)
     
-    tester = ErrorHandlingTester(str(server_path), safe_root)
-    tester.run_all_tests()
+    with ErrorHandlingTester(str(server_path), safe_root) as tester:
+        tester.run_all_tests()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,13 +3,64 @@
 Comprehensive test for potential hanging scenarios in command execution
 """
 
-import json
-import subprocess
-import sys
 import time
-import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from mcp_test_client import MCPClient
+
+def _run_hanging_case(i, test_case, server_path, safe_root):
+    """Run one scenario on its own server and return its report lines"""
+    log = [f"\n🧪 Test {i}: {test_case['name']}"]
+    
+    client = None
+    try:
+        # Start fresh server for each test; its debug output is collected by the client
+        client = MCPClient(server_path, safe_root)
+        
+        # Initialize and send the test command as one JSON-RPC batch
+        start_time = time.time()
+        _, cmd_id = client.request_batch([
+            ("initialize", {}),
+            ("tools/call", {
+                "name": "run_shell",
+                "arguments": {
+                    "command": test_case["command"],
+                    "stream": test_case["stream"]
+                }
+            })
+        ])
+        
+        # Wait for the response; the client's selector enforces the 10 second budget
+        resp_data = client.recv(cmd_id, timeout=10)
+        elapsed = time.time() - start_time
+        
+        if resp_data and "result" in resp_data:
+            content = resp_data["result"]["content"][0]["text"]
+            
+            # Determine if this was expected timing
+            if elapsed < 5.0:
+                status = "✅ FAST" if test_case["expected_fast"] else "⚠️ UNEXPECTEDLY FAST"
+            else:
+                status = "❌ SLOW" if test_case["expected_fast"] else "✅ EXPECTED SLOW"
+            
+            log.append(f"   {status} - Completed in {elapsed:.3f}s")
+            log.append(f"   Output: '{content[:100]}{'...' if len(content) > 100 else ''}'")
+        else:
+            log.append(f"   ❌ TIMEOUT - No response after {elapsed:.1f}s")
+            log.append("   Last debug output:")
+            for line in client.stderr_lines[-3:]:
+                log.append(f"     {line}")
+    
+    except Exception as e:
+        log.append(f"   ❌ Test failed with exception: {e}")
+    finally:
+        # Cleanup
+        if client:
+            client.close(graceful=False, timeout=2)
+    
+    return log
+
 def test_potential_hanging_scenarios():
     """Test scenarios that might cause command hanging"""
     print("🚨 Testing Potential Command Hanging Scenarios")
@@ -63,101 +114,12 @@ def test_potential_hanging_scenarios():
         }
     ]
     
-    for i, test_case in enumerate(test_cases, 1):
-        print(f"\n🧪 Test {i}: {test_case['name']}")
-        
-        try:
-            # Start fresh server for each test
-            server_proc = subprocess.Popen(
-                [sys.executable, str(server_path), "--saferoot", str(safe_root), "--debug"],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1
-            )
-            
-            stderr_output = []
-            def read_stderr():
-                while True:
-                    line = server_proc.stderr.readline()
-                    if not line:
-                        break
-                    stderr_output.append(line.strip())
-            
-            stderr_thread = threading.Thread(target=read_stderr, daemon=True)
-            stderr_thread.start()
-            
-            # Initialize
-            init_msg = {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}}
-            server_proc.stdin.write(json.dumps(init_msg) + "\n")
-            server_proc.stdin.flush()
-            server_proc.stdout.readline()  # Consume init response
-            
-            # Send test command
-            start_time = time.time()
-            cmd_msg = {
-                "jsonrpc": "2.0",
-                "id": 2,
-                "method": "tools/call",
-                "params": {
-                    "name": "run_shell",
-                    "arguments": {
-                        "command": test_case["command"],
-                        "stream": test_case["stream"]
-                    }
-                }
-            }
-            
-            server_proc.stdin.write(json.dumps(cmd_msg) + "\n")
-            server_proc.stdin.flush()
-            
-            # Wait for response with timeout
-            response_received = False
-            timeout = time.time() + 10  # 10 second timeout
-            
-            while time.time() < timeout:
-                response = server_proc.stdout.readline()
-                if response:
-                    elapsed = time.time() - start_time
-                    try:
-                        resp_data = json.loads(response)
-                        if "result" in resp_data:
-                            content = resp_data["result"]["content"][0]["text"]
-                            
-                            # Determine if this was expected timing
-                            if elapsed < 5.0:
-                                status = "✅ FAST" if test_case["expected_fast"] else "⚠️ UNEXPECTEDLY FAST"
-                            else:
-                                status = "❌ SLOW" if test_case["expected_fast"] else "✅ EXPECTED SLOW"
-                            
-                            print(f"   {status} - Completed in {elapsed:.3f}s")
-                            print(f"   Output: '{content[:100]}{'...' if len(content) > 100 else ''}'")
-                            response_received = True
-                            break
-                    except json.JSONDecodeError:
-                        elapsed = time.time() - start_time
-                        print(f"   ❌ JSON ERROR after {elapsed:.3f}s: {response[:100]}")
-                        break
-                else:
-                    time.sleep(0.1)
-            
-            if not response_received:
-                elapsed = time.time() - start_time
-                print(f"   ❌ TIMEOUT - No response after {elapsed:.1f}s")
-                print("   Last debug output:")
-                for line in stderr_output[-3:]:
-                    print(f"     {line}")
-            
-            # Cleanup
-            try:
-                server_proc.terminate()
-                server_proc.wait(timeout=2)
-            except:
-                server_proc.kill()
-                
-        except Exception as e:
-            print(f"   ❌ Test failed with exception: {e}")
+    # Every case runs on its own server, so a small pool overlaps their startup and waits
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        jobs = [pool.submit(_run_hanging_case, i, test_case, server_path, safe_root)
+                for i, test_case in enumerate(test_cases, 1)]
+        for job in jobs:
+            print("\n".join(job.result()))
     
     print("\n🎯 Summary:")
     print("If all tests show FAST completion, the server is working correctly.")
@@ -3,17 +3,22 @@
 Comprehensive test for task status hanging fixes
 """
 
-import json
+import asyncio
+import os
+import signal
 import subprocess
 import time
-import threading
 from pathlib import Path
 
+from mcp_test_client import PYTHON, call_once, find_response, kill_tree, result_text, spawn, tool_batch
+
+# Resolved once: every request below starts a fresh server with the same argv
+SERVER_PATH = str(Path(__file__).resolve().parent / "safe_shell_mcp.py")
+SAFE_ROOT = "/home/prabeer/DevelopmentNov"
+_ARGV = (PYTHON, SERVER_PATH, "--saferoot", SAFE_ROOT)
+
 def test_no_hanging():
     """Test that task status commands don't hang under various conditions"""
-    server_path = Path(__file__).parent / "safe_shell_mcp.py"
-    safe_root = "/home/prabeer/DevelopmentNov"
-    
     print("🧪 Testing Task Status No-Hanging Guarantee")
     print("=" * 60)
     
@@ -23,7 +28,7 @@ def test_no_hanging():
     # Start multiple background tasks
     task_ids = []
     for i in range(3):
-        result = send_mcp_command(server_path, safe_root, "run_shell", {
+        result = send_mcp_command("run_shell", {
             "command": f"echo 'Task {i+1} started'; sleep {i+2}; echo 'Task {i+1} done'",
             "background": True
         })
@@ -33,32 +38,26 @@ def test_no_hanging():
             print(f"   Started task {i+1}: {task_id}")
     
     # Test concurrent status requests
-    def check_task_status(task_id, results, index):
+    async def check_task_status(task_id):
         """Check task status with timeout protection"""
         start_time = time.time()
         try:
-            result = send_mcp_command(server_path, safe_root, "task_status", {"task_id": task_id}, timeout=5)
+            result = await send_mcp_command_async("task_status", {"task_id": task_id}, timeout=5)
             elapsed = time.time() - start_time
-            results[index] = f"Status for {task_id}: {result[:100]}... (took {elapsed:.1f}s)"
+            return f"Status for {task_id}: {result[:100]}... (took {elapsed:.1f}s)"
         except Exception as e:
             elapsed = time.time() - start_time
-            results[index] = f"Error for {task_id}: {e} (took {elapsed:.1f}s)"
-    
-    # Run concurrent status checks
-    results = [None] * len(task_ids)
-    threads = []
+            return f"Error for {task_id}: {e} (took {elapsed:.1f}s)"
     
-    for i, task_id in enumerate(task_ids):
-        thread = threading.Thread(target=check_task_status, args=(task_id, results, i))
-        threads.append(thread)
-        thread.start()
+    # Run concurrent status checks - one event loop instead of a thread per request;
+    # each check enforces its own timeout
+    async def check_all():
+        return await asyncio.gather(*(check_task_status(task_id) for task_id in task_ids))
     
-    # Wait for all threads with timeout
-    for thread in threads:
-        thread.join(timeout=10)  # 10 second timeout per thread
+    results = asyncio.run(check_all())
     
     for i, result in enumerate(results):
-        print(f"   Thread {i+1}: {result}")
+        print(f"   Request {i+1}: {result}")
     
     # Test 2: Rapid fire status requests
     print("\n2️⃣ Testing rapid fire status requests...")
@@ -69,7 +68,7 @@ def test_no_hanging():
         for i in range(5):
             start_time = time.time()
             try:
-                result = send_mcp_command(server_path, safe_root, "task_status", {"task_id": test_task_id}, timeout=3)
+                result = send_mcp_command("task_status", {"task_id": test_task_id}, timeout=3)
                 elapsed = time.time() - start_time
                 rapid_results.append(f"Request {i+1}: OK ({elapsed:.1f}s)")
             except Exception as e:
@@ -83,7 +82,7 @@ def test_no_hanging():
     print("\n3️⃣ Testing task list under load...")
     start_time = time.time()
     try:
-        list_result = send_mcp_command(server_path, safe_root, "task_list", {}, timeout=5)
+        list_result = send_mcp_command("task_list", {}, timeout=5)
         elapsed = time.time() - start_time
         print(f"   Task list: OK ({elapsed:.1f}s) - {len(list_result)} chars")
     except Exception as e:
@@ -96,7 +95,7 @@ def test_no_hanging():
     for fake_id in fake_tasks:
         start_time = time.time()
         try:
-            result = send_mcp_command(server_path, safe_root, "task_status", {"task_id": fake_id}, timeout=3)
+            result = send_mcp_command("task_status", {"task_id": fake_id}, timeout=3)
             elapsed = time.time() - start_time
             print(f"   {fake_id}: OK ({elapsed:.1f}s) - {result[:50]}...")
         except Exception as e:
@@ -110,48 +109,50 @@ def test_no_hanging():
     print("   • No hanging or deadlock conditions detected")
     print("   • Error handling working correctly")
 
-def send_mcp_command(server_path, safe_root, tool_name, params, timeout=10):
+def _tool_text(stdout):
+    """Return the text of the tools/call response (id 1) in captured server output"""
+    return result_text(find_response(stdout, 1), "No valid response received")
+
+def send_mcp_command(tool_name, params, timeout=10):
     """Send a command to MCP server with configurable timeout"""
-    init_msg = {"jsonrpc": "2.0", "id": 0, "method": "initialize", "params": {}}
-    tool_msg = {
-        "jsonrpc": "2.0", "id": 1, "method": "tools/call",
-        "params": {"name": tool_name, "arguments": params}
-    }
-    
-    proc = subprocess.Popen(
-        ["python3", str(server_path), "--saferoot", safe_root],
-        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    proc = spawn(
+        _ARGV,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL  # stderr is never inspected
     )
     
-    input_data = json.dumps(init_msg) + "\n" + json.dumps(tool_msg) + "\n"
-    
     try:
-        stdout, stderr = proc.communicate(input=input_data, timeout=timeout)
-        
-        # Parse responses
-        responses = []
-        for line in stdout.strip().split('\n'):
-            if line:
-                try:
-                    responses.append(json.loads(line))
-                except json.JSONDecodeError:
-                    pass
+        # Returns on the tool response; the finally below reaps the server
+        stdout = call_once(proc, tool_batch(tool_name, params), timeout, rid=1)
         
-        # Return the tool response
-        for response in responses:
-            if "result" in response and response.get("id") == 1:
-                content = response["result"].get("content", [])
-                if content and len(content) > 0:
-                    return content[0].get("text", "")
-        
-        return "No valid response received"
+        return _tool_text(stdout)
         
     except subprocess.TimeoutExpired:
-        proc.kill()
         raise Exception(f"Command timed out after {timeout}s")
     finally:
-        if proc.poll() is None:
-            proc.terminate()
+        # Reap the server and anything it left running
+        kill_tree(proc)
+
+async def send_mcp_command_async(tool_name, params, timeout=10):
+    """asyncio variant of send_mcp_command for running many requests concurrently"""
+    proc = await asyncio.create_subprocess_exec(
+        *_ARGV,
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL, start_new_session=True, close_fds=False
+    )
+    
+    try:
+        stdout, _ = await asyncio.wait_for(proc.communicate(tool_batch(tool_name, params)), timeout)
+        return _tool_text(stdout)
+    except asyncio.TimeoutError:
+        raise Exception(f"Command timed out after {timeout}s")
+    finally:
+        # Reap the server and anything it left running
+        if proc.returncode is None:
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await proc.wait()
 
 if __name__ == "__main__":
     test_no_hanging()
\ No newline at end of file
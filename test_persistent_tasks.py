@@ -4,78 +4,63 @@ Test script for persistent background tasks functionality
 Demonstrates how background tasks survive server restarts
 """
 
-import json
 import subprocess
 import sys
 import time
 import os
 from pathlib import Path
 
+from mcp_test_client import PYTHON, call_once, find_response, kill_tree, loads, result_text, spawn, tool_batch
+
 class PersistentTaskTester:
     def __init__(self, server_path, safe_root):
         self.server_path = server_path
         self.safe_root = safe_root
+        self.storage_file = Path(safe_root) / ".mcp_background_tasks.json"
+        # Every command starts a fresh server with the same argv
+        self._argv = (PYTHON, str(server_path), "--saferoot", str(safe_root))
+        self._storage_cache = (None, None)  # ((inode, mtime_ns, size), parsed tasks)
+        
+    def load_storage(self):
+        """Parse the persistent task store, reusing the last parse while the file is unchanged.
+        The server replaces the store by rename, so the inode changes on every save
+        even when a coarse mtime does not"""
+        st = self.storage_file.stat()
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if key != self._storage_cache[0]:
+            self._storage_cache = (key, loads(self.storage_file.read_bytes()))
+        return self._storage_cache[1]
         
     def send_mcp_command(self, tool_name, params=None):
         """Send a command to MCP server and get response"""
         if params is None:
             params = {}
         
-        # Prepare messages
-        init_msg = {
-            "jsonrpc": "2.0",
-            "id": 0,
-            "method": "initialize",
-            "params": {}
-        }
-        
-        tool_msg = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "tools/call",
-            "params": {
-                "name": tool_name,
-                "arguments": params
-            }
-        }
-        
+        proc = None
         try:
-            # Start MCP server
-            proc = subprocess.Popen(
-                ["python3", self.server_path, "--saferoot", self.safe_root, "--debug"],
+            # Start MCP server (debug output is never inspected, so discard it)
+            proc = spawn(
+                self._argv,
                 stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+                stderr=subprocess.DEVNULL
             )
             
-            # Send messages
-            input_data = json.dumps(init_msg) + "\n" + json.dumps(tool_msg) + "\n"
-            stdout, stderr = proc.communicate(input=input_data, timeout=10)
-            
-            # Parse responses
-            responses = []
-            for line in stdout.strip().split('\n'):
-                if line:
-                    try:
-                        responses.append(json.loads(line))
-                    except json.JSONDecodeError:
-                        pass
+            # Send messages as one JSON-RPC batch and stop reading at the tool response,
+            # without waiting for the server to shut down (its tasks run in their own sessions)
+            stdout = call_once(proc, tool_batch(tool_name, params), timeout=10, rid=1)
             
             # Return the tool response
-            for response in responses:
-                if "result" in response and response.get("id") == 1:
-                    content = response["result"].get("content", [])
-                    if content and len(content) > 0:
-                        return content[0].get("text", "")
-            
-            return "No valid response received"
+            return result_text(find_response(stdout, 1), "No valid response received")
             
         except subprocess.TimeoutExpired:
-            proc.kill()
             return "Command timed out"
         except Exception as e:
             return f"Error: {e}"
+        finally:
+            # Reap the server and anything it left running, however the call ended
+            if proc is not None:
+                kill_tree(proc)
 
     def test_persistent_tasks(self):
         """Test persistent background tasks across server restarts"""
@@ -102,13 +87,12 @@ class PersistentTaskTester:
         print(f"   Tasks: {result}")
         
         # Step 3: Check if persistent storage file exists
-        storage_file = Path(self.safe_root) / ".mcp_background_tasks.json"
+        storage_file = self.storage_file
         print(f"\n3️⃣ Checking persistent storage...")
         if storage_file.exists():
             print(f"   ✅ Storage file exists: {storage_file}")
-            with open(storage_file, 'r') as f:
-                data = json.load(f)
-                print(f"   📄 Tasks in storage: {len(data)}")
+            data = self.load_storage()
+            print(f"   📄 Tasks in storage: {len(data)}")
         else:
             print(f"   ❌ Storage file not found: {storage_file}")
         
@@ -124,11 +108,10 @@ class PersistentTaskTester:
         # Step 6: Check storage file after restart
         print(f"\n6️⃣ Checking storage after restart...")
         if storage_file.exists():
-            with open(storage_file, 'r') as f:
-                data = json.load(f)
-                print(f"   📄 Tasks in storage after restart: {len(data)}")
-                for tid, task_data in data.items():
-                    print(f"   • {tid}: {task_data['status']} - {task_data['command'][:50]}")
+            data = self.load_storage()
+            print(f"   📄 Tasks in storage after restart: {len(data)}")
+            for tid, task_data in data.items():
+                print(f"   • {tid}: {task_data['status']} - {task_data['command'][:50]}")
         
         # Step 7: Try to get task output if we have task ID
         if task_id:
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Parameterized run_shell tests for the MCP Shell Server: chmod globs, streaming,
+background tasks and the curl command that used to hang
+Run with `python3 -m pytest test_shell.py`; run_shell cases lease servers from the
+`mcp_pool` fixture, background tasks share `mcp_server` and the asyncio cases start
+a server per case
+"""
+
+import asyncio
+import shlex
+import time
+from collections import deque
+from pathlib import Path
+
+import pytest
+
+from mcp_test_client import AsyncMCPClient, proc_diagnostics, result_text, timeout_for
+
+_HERE = Path(__file__).resolve().parent
+_SERVER = str(_HERE / "safe_shell_mcp.py")
+_SAFE_ROOT = str(_HERE.parent)
+_DEMO_DIR = "/home/prabeer/DevelopmentNov/demo-mcp"
+_ADMIN_DIR = "/home/prabeer/DevelopmentNov/HYLUMINIX/mapapp/scripts/admin_panel"
+
+def _chmod_command(directory, pattern="*.py"):
+    """chmod +x for the files matching pattern, expanded here so the server's shell
+    gets plain quoted paths instead of a wildcard; None when nothing matches"""
+    files = sorted(str(path) for path in Path(directory).glob(pattern))
+    if not files:
+        return None
+    return "chmod +x " + " ".join(shlex.quote(f) for f in files)
+
+# The exact command that was hanging
+_PROBLEM_COMMAND = 'curl -s http://localhost:3000/ | grep -E "(Transform Your Business|HYLUMINIX)" | head -3'
+
+# (id, command, stream, expected output) - a None command is skipped; each command
+# gets timeout_for() its first word
+COMMANDS = [
+    # chmod with the glob expanded client-side
+    ("chmod-demo", _chmod_command(_DEMO_DIR), False, None),
+    ("chmod-admin", _chmod_command(_ADMIN_DIR), False, None),
+    ("chmod-admin-stream", _chmod_command(_ADMIN_DIR), True, None),
+    # Keeps its shell wildcard on purpose, as the glob-vs-explicit-files control
+    ("glob-control", f"echo 'Testing glob pattern' && ls {_DEMO_DIR}/*.py | head -1",
+     False, "Testing glob pattern"),
+    ("echo", "echo 'Hello World' && sleep 1 && echo 'Done'", False, "Done"),
+    # The same loop with and without streaming, to compare the two paths
+    ("loop", "for i in {1..5}; do echo \"Output line $i\"; sleep 1; done",
+     False, "Output line 5"),
+    ("loop-stream", "for i in {1..5}; do echo \"Output line $i\"; sleep 1; done",
+     True, "Output line 5"),
+    ("long-stream", "echo 'Starting long process'; for i in {1..10}; do echo \"Processing item $i/10\"; sleep 0.5; done; echo 'Process completed'",
+     True, "Process completed"),
+    # Should finish or be cut off by the server's network timeout, never hang
+    ("curl-hang", _PROBLEM_COMMAND, True, None),
+]
+
+# Bounded streamed cases, rerun on the asyncio client; the hang-prone ones only run
+# once, on the pool, so their long timeouts aren't paid twice
+STREAMED = [case for case in COMMANDS if case[0] in ("loop-stream", "long-stream")]
+
+# (id, command, seconds to wait before asking for its status)
+BACKGROUND = [
+    ("chmod-admin", _chmod_command(_ADMIN_DIR), 3),
+    ("loop", "for i in {1..3}; do echo \"Background line $i\"; sleep 1; done", 2),
+]
+
+def _skip_if_missing(command):
+    if command is None:
+        pytest.skip("no *.py files to chmod")
+
+@pytest.mark.parametrize(
+    "command,stream,expected",
+    [case[1:] for case in COMMANDS], ids=[case[0] for case in COMMANDS]
+)
+def test_run_shell(mcp_pool, command, stream, expected):
+    """The command answers within its timeout, streaming or not. Runs on a leased
+    server: one left busy with a hung command is replaced, not reused."""
+    _skip_if_missing(command)
+    timeout = timeout_for(command)
+    print(f"\n📝 Command: {command}")
+    start = time.monotonic()
+    
+    progress_count = 0
+    last_print = 0.0
+    # Recent progress lines, dumped if the command hangs
+    progress_ring = deque(maxlen=8)
+    
+    def on_progress(params):
+        # Printing every frame makes terminal I/O the bottleneck on chatty
+        # commands, so print at most every 0.5s or every 32nd frame
+        nonlocal progress_count, last_print
+        progress_count += 1
+        now = time.monotonic()
+        line = f"[{now - start:6.1f}s] Progress #{progress_count}: {params.get('output', '')}"
+        progress_ring.append(line)
+        if now - last_print > 0.5 or progress_count % 32 == 0:
+            print(line)
+            last_print = now
+    
+    with mcp_pool.lease() as client:
+        response = client.call("run_shell", {"command": command, "stream": stream},
+                               timeout=timeout, on_progress=on_progress)
+        elapsed = time.monotonic() - start
+        
+        if response is None:
+            print(f"❌ NO RESPONSE after {elapsed:.1f}s with {progress_count} progress updates")
+            for line in progress_ring:
+                print(f"  {line}")
+            # Capture where the server and its shells are blocked
+            print("Process diagnostics:")
+            for line in proc_diagnostics(client.proc.pid):
+                print(f"  {line}")
+        # Raising inside the lease makes the pool replace the stuck server
+        assert response, f"no response within {timeout:.0f}s"
+    
+    text = result_text(response)
+    print(f"📥 Response after {elapsed:.1f}s:\n{text[:500]}")
+    if expected is not None:
+        assert expected in text
+
+@pytest.mark.parametrize(
+    "command,expected", [(case[1], case[3]) for case in STREAMED], ids=[case[0] for case in STREAMED]
+)
+def test_run_shell_async(command, expected):
+    """The asyncio client gets the streamed result within the same timeout"""
+    _skip_if_missing(command)
+    timeout = timeout_for(command)
+    progress = []
+    
+    async def run():
+        async with AsyncMCPClient(_SERVER, _SAFE_ROOT) as client:
+            assert await client.initialize(), "no response to initialize"
+            return await client.call("run_shell", {"command": command, "stream": True},
+                                     timeout=timeout, on_progress=progress.append)
+    
+    start = time.monotonic()
+    response = asyncio.run(run())
+    elapsed = time.monotonic() - start
+    assert response, f"no response within {timeout:.0f}s"
+    
+    text = result_text(response)
+    print(f"📥 Response after {elapsed:.1f}s and {len(progress)} progress updates:\n{text[:500]}")
+    if expected is not None:
+        assert expected in text
+
+@pytest.mark.parametrize(
+    "command,wait", [case[1:] for case in BACKGROUND], ids=[case[0] for case in BACKGROUND]
+)
+def test_background_task(mcp_server, command, wait):
+    """A background task starts immediately and reports its status afterwards"""
+    _skip_if_missing(command)
+    start = time.monotonic()
+    response = mcp_server.call("run_shell", {"command": command, "background": True})
+    assert response, "no response to background run_shell"
+    
+    assert "Background task started with ID:" in result_text(response)
+    task_id = response["result"].get("structuredContent", {}).get("task_id")
+    assert task_id, f"no structuredContent task_id in {response['result']}"
+    print(f"🔄 Background task started after {time.monotonic() - start:.1f}s with ID: {task_id}")
+    
+    mcp_server.wait(wait)  # Keeps draining server debug output while waiting
+    response = mcp_server.call("task_status", {"task_id": task_id})
+    assert response, "no response to task_status"
+    print(f"📊 Background task status after {time.monotonic() - start:.1f}s: {result_text(response)}")
@@ -3,101 +3,86 @@
 Test script to verify the task_status hanging fix
 """
 
-import json
-import subprocess
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-def test_task_status_robustness():
+from mcp_test_client import ServerPool, result_text
+
+def test_task_status_robustness(mcp_pool):
     """Test task_status command robustness with various scenarios"""
-    server_path = Path(__file__).parent / "safe_shell_mcp.py"
-    safe_root = "/home/prabeer/DevelopmentNov"
-    
     print("🧪 Testing Task Status Robustness")
     print("=" * 50)
     
-    # Test 1: Normal task status
-    print("1️⃣ Testing normal task status...")
-    result = send_mcp_command(server_path, safe_root, "run_shell", {
+    # The scenarios touch disjoint tasks, so each borrows its own warm server and
+    # the normal task's wait overlaps the other two. Reports print in order.
+    scenarios = (run_normal, run_list, run_missing)
+    with ThreadPoolExecutor(max_workers=len(scenarios)) as pool:
+        jobs = [pool.submit(_run_on_own_server, scenario, mcp_pool) for scenario in scenarios]
+        for job in jobs:
+            print("\n".join(job.result()))
+    
+    print("\n✅ Task status robustness tests completed!")
+
+def _run_on_own_server(scenario, mcp_pool):
+    """Run one scenario on a server leased from the pool; returns its report lines"""
+    with mcp_pool.lease() as client:
+        return scenario(client)
+
+def run_normal(client):
+    """Test 1: Normal task status"""
+    log = ["1️⃣ Testing normal task status..."]
+    response = client.call("run_shell", {
         "command": "echo 'Test task'; sleep 2; echo 'Done'",
         "background": True
-    })
-    print(f"Background task result: {result}")
+    }, timeout=10)
+    log.append(f"Background task result: {result_text(response, 'No valid response received')}")
     
-    # Extract task ID from result
-    task_id = None
-    if "Background task started with ID:" in result:
-        task_id = result.split("Background task started with ID: ")[1].split("\n")[0]
-        print(f"Task ID: {task_id}")
+    # The task ID comes back as structuredContent alongside the text
+    task_id = (response or {}).get("result", {}).get("structuredContent", {}).get("task_id")
+    if task_id:
+        log.append(f"Task ID: {task_id}")
         
         # Test task status immediately
-        status_result = send_mcp_command(server_path, safe_root, "task_status", {"task_id": task_id})
-        print(f"Task status: {status_result}")
+        status_result = send_mcp_command(client, "task_status", {"task_id": task_id})
+        log.append(f"Task status: {status_result}")
         
         # Test task output
-        output_result = send_mcp_command(server_path, safe_root, "task_output", {"task_id": task_id})
-        print(f"Task output: {output_result}")
+        output_result = send_mcp_command(client, "task_output", {"task_id": task_id})
+        log.append(f"Task output: {output_result}")
         
         # Wait and check again
         time.sleep(3)
-        final_status = send_mcp_command(server_path, safe_root, "task_status", {"task_id": task_id})
-        print(f"Final status: {final_status}")
-    
-    # Test 2: Task list
-    print("\n2️⃣ Testing task list...")
-    list_result = send_mcp_command(server_path, safe_root, "task_list", {})
-    print(f"Task list: {list_result}")
-    
-    # Test 3: Non-existent task
-    print("\n3️⃣ Testing non-existent task...")
-    fake_status = send_mcp_command(server_path, safe_root, "task_status", {"task_id": "fake-task-id"})
-    print(f"Fake task status: {fake_status}")
-    
-    print("\n✅ Task status robustness tests completed!")
+        final_status = send_mcp_command(client, "task_status", {"task_id": task_id})
+        log.append(f"Final status: {final_status}")
+    return log
 
-def send_mcp_command(server_path, safe_root, tool_name, params):
-    """Send a command to MCP server and get response"""
-    init_msg = {"jsonrpc": "2.0", "id": 0, "method": "initialize", "params": {}}
-    tool_msg = {
-        "jsonrpc": "2.0", "id": 1, "method": "tools/call",
-        "params": {"name": tool_name, "arguments": params}
-    }
-    
+def run_list(client):
+    """Test 2: Task list"""
+    list_result = send_mcp_command(client, "task_list", {})
+    return ["\n2️⃣ Testing task list...", f"Task list: {list_result}"]
+
+def run_missing(client):
+    """Test 3: Non-existent task"""
+    fake_status = send_mcp_command(client, "task_status", {"task_id": "fake-task-id"})
+    return ["\n3️⃣ Testing non-existent task...", f"Fake task status: {fake_status}"]
+
+def send_mcp_command(client, tool_name, params):
+    """Send a command to the shared MCP server and get the tool's text"""
     try:
-        proc = subprocess.Popen(
-            ["python3", str(server_path), "--saferoot", safe_root],
-            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
-        )
+        response = client.call(tool_name, params, timeout=10)
+        if response is None:
+            return "Command timed out"
         
-        input_data = json.dumps(init_msg) + "\n" + json.dumps(tool_msg) + "\n"
+        # Return the tool response
+        if "result" in response:
+            return result_text(response, "No valid response received")
+        return "No valid response received"
         
-        try:
-            stdout, stderr = proc.communicate(input=input_data, timeout=10)
-            
-            # Parse responses
-            responses = []
-            for line in stdout.strip().split('\n'):
-                if line:
-                    try:
-                        responses.append(json.loads(line))
-                    except json.JSONDecodeError:
-                        pass
-            
-            # Return the tool response
-            for response in responses:
-                if "result" in response and response.get("id") == 1:
-                    content = response["result"].get("content", [])
-                    if content and len(content) > 0:
-                        return content[0].get("text", "")
-            
-            return "No valid response received"
-            
-        except subprocess.TimeoutExpired:
-            proc.kill()
-            return "Command timed out"
-            
     except Exception as e:
         return f"Error: {e}"
 
 if __name__ == "__main__":
-    test_task_status_robustness()
\ No newline at end of file
+    server_path = Path(__file__).parent / "safe_shell_mcp.py"
+    with ServerPool(server_path, "/home/prabeer/DevelopmentNov") as pool:
+        test_task_status_robustness(pool)
\ No newline at end of file